@@ -1,9 +1,15 @@
 # app.py
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Tuple
 from fastapi import FastAPI, UploadFile, File, HTTPException, Body
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-import ssl, time, random, smtplib, hashlib, dns.resolver, csv, io, os
+import ssl, time, random, secrets, smtplib, socket, dns.resolver, dns.asyncresolver, csv, io, os, re
+import asyncio, heapq, threading, weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from email.utils import parseaddr
+from operator import attrgetter
 
 APP_NAME = "email-verifier"
 VERSION = "1.0.1"
@@ -16,9 +22,31 @@ GOOGLE_THRESHOLD = float(os.getenv("GOOGLE_THRESHOLD_MS", "60"))
 DEFAULT_THRESHOLD = float(os.getenv("DEFAULT_THRESHOLD_MS", "80"))
 DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "1.2"))
 SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+SMTP_CONNECT_TIMEOUT = float(os.getenv("SMTP_CONNECT_TIMEOUT", "2"))  # TCP connect only, per MX host
+MX_MAX_TRIES = int(os.getenv("MX_MAX_TRIES", "3"))  # MX hosts walked before giving up
 MAX_BULK = int(os.getenv("MAX_BULK", "1000"))
+MX_CACHE_TTL = float(os.getenv("MX_CACHE_TTL", "900"))      # cap on honoured DNS TTL
+MAX_EMAILS_PER_CONN = int(os.getenv("MAX_EMAILS_PER_CONN", "1000"))  # retire a session after this many targets
+MX_POOL_MAX = int(os.getenv("MX_POOL_MAX", "4"))  # idle sessions kept per MX host
+POOL_MAX_IDLE_TOTAL = int(os.getenv("POOL_MAX_IDLE_TOTAL", "256"))  # idle sessions kept overall
+POOL_CHECK_AFTER = float(os.getenv("POOL_CHECK_AFTER", "60"))  # idle secs before a NOOP health check
+POOL_IDLE_MAX = float(os.getenv("POOL_IDLE_MAX", "240"))  # idle secs before a session is dropped
+POOL_NOOP_TIMEOUT = float(os.getenv("POOL_NOOP_TIMEOUT", "2"))
+MX_NEGATIVE_TTL = float(os.getenv("MX_NEGATIVE_TTL", "60"))  # NXDOMAIN / no MX
+MX_CACHE_MAX = int(os.getenv("MX_CACHE_MAX", "10000"))
+DNS_CACHE_MAX = int(os.getenv("DNS_CACHE_MAX", "10000"))  # dnspython answer cache under the MX cache
+DISPOSABLE_DOMAINS_FILE = os.getenv(
+    "DISPOSABLE_DOMAINS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "disposable_domains.txt")
+)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "64"))  # in-flight MX lookups per prewarm
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "32"))  # threads running SMTP sessions
+MX_CONCURRENCY = int(os.getenv("MX_CONCURRENCY", "2"))  # concurrent sessions per MX host
+MX_SLOT_TARGETS = int(os.getenv("MX_SLOT_TARGETS", "50"))  # targets per hold of an MX slot
+MX_SLOT_WAIT = float(os.getenv("MX_SLOT_WAIT", "30"))  # max secs to wait for an MX slot
 
-app = FastAPI(title=APP_NAME, version=VERSION)
+BULK_EXECUTOR = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="smtp")
+
+app = FastAPI(title=APP_NAME, version=VERSION, default_response_class=ORJSONResponse)
 
 # -------- Models --------
 class VerifyResponse(BaseModel):
@@ -27,10 +55,10 @@ class VerifyResponse(BaseModel):
     mx_host: Optional[str] = None
     mx_brand: Optional[str] = None
     result: Literal["valid", "invalid"]
-    catch_all: bool = Field(..., serialization_alias="catch-all")  # <- alias for output key
+    catch_all: bool = Field(..., alias="catch-all")  # <- alias for output key
     deliverability: Literal["deliverable", "undeliverable"]
 
-    # Ensure FastAPI can populate by field name, but serialize using alias by default
+    # Accepts the plain result dicts ("catch-all" key) as well as catch_all=...
     model_config = ConfigDict(populate_by_name=True)
 
 class BulkRequest(BaseModel):
@@ -39,25 +67,149 @@ class BulkRequest(BaseModel):
 
 # -------- Helpers --------
 def get_domain(email: str) -> str:
-    _, addr = parseaddr(email)
-    if '@' not in addr:
+    # expects a bare address: EmailStr-validated, or parseaddr'd on the CSV path
+    i = email.rfind('@')
+    if i < 0:
         raise ValueError("Invalid email")
-    return addr.split('@', 1)[1].lower().strip()
+    return email[i + 1:].strip().lower()
+
+# RFC 5321 limits (octets). Local parts may be non-ASCII (EmailStr keeps
+# them Unicode); domains are checked in their IDNA (xn--) form.
+MAX_LOCALPART_LEN = 64
+MAX_ADDRESS_LEN = 254
+LOCALPART_RE = re.compile(
+    r"(?:[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]|[^\x00-\x7f])+"
+    r"(?:\.(?:[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]|[^\x00-\x7f])+)*"
+)
+DOMAIN_RE = re.compile(r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z0-9-]{2,63}")
+
+def idna_domain(domain: str) -> str:
+    """ASCII form of a domain; raises UnicodeError if it can't be IDNA-encoded."""
+    return domain if domain.isascii() else domain.encode("idna").decode("ascii")
+
+def ascii_addr(email: str) -> str:
+    # SMTP commands go out as ASCII, so IDN domains are probed as xn-- labels
+    local, _, domain = email.rpartition("@")
+    return f"{local}@{idna_domain(domain)}"
+
+def _load_domain_list(path: str) -> frozenset:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return frozenset(
+                line.strip().lower() for line in fh
+                if line.strip() and not line.startswith("#")
+            )
+    except OSError:
+        return frozenset()
+
+DISPOSABLE_DOMAINS = _load_domain_list(DISPOSABLE_DOMAINS_FILE)
+
+def cheap_syntax_ok(email: str) -> bool:
+    """Offline syntax check; anything failing it can't survive the SMTP probe either."""
+    local, _, domain = email.rpartition("@")
+    try:
+        domain = idna_domain(domain)
+    except UnicodeError:
+        return False
+    local_len = len(local.encode("utf-8"))
+    if local_len > MAX_LOCALPART_LEN or local_len + 1 + len(domain) > MAX_ADDRESS_LEN:
+        return False
+    return bool(LOCALPART_RE.fullmatch(local) and DOMAIN_RE.fullmatch(domain))
+
+def is_disposable(domain: str) -> bool:
+    return domain in DISPOSABLE_DOMAINS
 
 def impossible_addr(domain: str) -> str:
-    token = hashlib.md5(str(random.random()).encode()).hexdigest()[:10]
-    return f"{token}-nope-{random.randint(1000,9999)}@{domain}"
+    return f"{secrets.token_hex(5)}-nope-{secrets.randbelow(9000) + 1000}@{idna_domain(domain)}"
+
+def _mx_hosts(answers) -> List[str]:
+    # only the first MX_MAX_TRIES hosts are ever dialled, so skip the full sort
+    best = heapq.nsmallest(MX_MAX_TRIES, answers, key=attrgetter("preference"))
+    return [str(r.exchange).rstrip('.') for r in best]
+
+# One configured resolver per flavour, sharing an answer cache, instead of
+# dnspython's lazily-built module defaults.
+RESOLVER = dns.resolver.Resolver()
+RESOLVER.lifetime = DNS_TIMEOUT
+RESOLVER.cache = dns.resolver.LRUCache(DNS_CACHE_MAX)
+ARESOLVER = dns.asyncresolver.Resolver()
+ARESOLVER.lifetime = DNS_TIMEOUT
+ARESOLVER.cache = RESOLVER.cache
+
+# domain -> (expiry_ts, hosts); insertion order doubles as eviction order
+_MX_CACHE: dict = {}
+_MX_CACHE_LOCK = threading.Lock()
 
-def resolve_mx(domain: str, timeout: float = DNS_TIMEOUT):
+def _mx_cache_get(domain: str) -> Optional[List[str]]:
+    with _MX_CACHE_LOCK:
+        hit = _MX_CACHE.get(domain)
+        if hit is None:
+            return None
+        if hit[0] <= time.monotonic():
+            del _MX_CACHE[domain]
+            return None
+        return hit[1]
+
+def _mx_cache_put(domain: str, hosts: List[str], ttl: float):
+    with _MX_CACHE_LOCK:
+        _MX_CACHE.pop(domain, None)
+        while len(_MX_CACHE) >= MX_CACHE_MAX:
+            del _MX_CACHE[next(iter(_MX_CACHE))]
+        _MX_CACHE[domain] = (time.monotonic() + ttl, hosts)
+
+def _mx_cache_store(domain: str, answers) -> List[str]:
+    hosts = _mx_hosts(answers)
+    _mx_cache_put(domain, hosts, min(float(answers.rrset.ttl), MX_CACHE_TTL))
+    return hosts
+
+def cached_resolve_mx(domain: str, timeout: float = DNS_TIMEOUT):
+    domain = domain.lower()
+    hosts = _mx_cache_get(domain)
+    if hosts is not None:
+        return hosts
     try:
-        answers = dns.resolver.resolve(domain, 'MX', lifetime=timeout)
-        prefs_hosts = sorted(
-            [(r.preference, str(r.exchange).rstrip('.')) for r in answers],
-            key=lambda x: x[0]
-        )
-        return [h for _, h in prefs_hosts]
+        return _mx_cache_store(domain, RESOLVER.resolve(domain, 'MX', lifetime=timeout))
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        _mx_cache_put(domain, [], MX_NEGATIVE_TTL)
+        return []
     except Exception:
+        # timeouts / SERVFAIL are not cached, the next lookup retries
+        return []
+
+async def _async_query_mx(domain: str, timeout: float) -> List[str]:
+    try:
+        return _mx_cache_store(domain, await ARESOLVER.resolve(domain, 'MX', lifetime=timeout))
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        _mx_cache_put(domain, [], MX_NEGATIVE_TTL)
         return []
+    except Exception:
+        return []
+
+# domain -> lookup task, so concurrent callers share one query per domain
+_MX_INFLIGHT: dict = {}
+
+async def async_resolve_mx(domain: str, timeout: float = DNS_TIMEOUT):
+    domain = domain.lower()
+    hosts = _mx_cache_get(domain)
+    if hosts is not None:
+        return hosts
+    task = _MX_INFLIGHT.get(domain)
+    if task is None:
+        task = asyncio.ensure_future(_async_query_mx(domain, timeout))
+        _MX_INFLIGHT[domain] = task
+        task.add_done_callback(lambda _: _MX_INFLIGHT.pop(domain, None))
+    # shielded: one caller being cancelled must not cancel everyone's lookup
+    return await asyncio.shield(task)
+
+async def prewarm_mx(domains) -> dict:
+    """Resolve every distinct domain up front in one concurrent wave; returns domain -> hosts."""
+    sem = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def resolve(domain: str):
+        async with sem:
+            return domain, await async_resolve_mx(domain)
+
+    return dict(await asyncio.gather(*(resolve(d) for d in set(domains))))
 
 def mx_brand_from_host(mx: str) -> str:
     h = (mx or "").lower()
@@ -68,103 +220,436 @@ def mx_brand_from_host(mx: str) -> str:
     if 'zoho' in h: return 'zoho'
     return 'other'
 
-def _smtp_open(mx_host: str, timeout: float = SMTP_TIMEOUT):
-    srv = smtplib.SMTP(mx_host, 25, timeout=timeout)
-    srv.ehlo("probe.local")
+def _mail_from(srv: smtplib.SMTP):
     try:
         srv.mail("<>")
     except Exception:
         srv.mail("<probe@probe.local>")
-    return srv
+
+@dataclass
+class SMTPConn:
+    """An open probe session plus the EHLO capabilities it was opened with."""
+    srv: smtplib.SMTP
+    host: str
+    features: dict
+    supports_pipelining: bool
+    used: int = 0  # targets probed; >0 means the envelope needs RSET + MAIL first
+    last_used: float = 0.0
+
+def _smtp_open(mx_host: str, timeout: float = SMTP_TIMEOUT,
+               connect_timeout: float = SMTP_CONNECT_TIMEOUT) -> SMTPConn:
+    # only the TCP connect gets the short budget, so a dead host fails fast;
+    # the 220 greeting may be deliberately delayed (greet pause, postscreen)
+    # and, like EHLO/RCPT replies, gets the full SMTP_TIMEOUT
+    sock = socket.create_connection((mx_host, 25), timeout=connect_timeout)
+    srv = smtplib.SMTP(local_hostname="probe.local", timeout=timeout)
+    try:
+        sock.settimeout(timeout)
+        srv.sock, srv._host = sock, mx_host
+        code, msg = srv.getreply()
+        if code != 220:
+            raise smtplib.SMTPConnectError(code, msg)
+        srv.ehlo("probe.local")
+        features = dict(srv.esmtp_features)
+        conn = SMTPConn(srv=srv, host=mx_host, features=features, supports_pipelining='pipelining' in features)
+        _mail_from(srv)
+    except Exception:
+        srv.close()
+        sock.close()
+        raise
+    return conn
+
+def _smtp_close(conn: SMTPConn):
+    try: conn.srv.quit()
+    except Exception:
+        try: conn.srv.close()
+        except Exception:
+            pass
+
+class SMTPPool:
+    """Idle probe sessions kept open per MX host, so later requests skip the handshake."""
+
+    def __init__(self, max_per_host: int = MX_POOL_MAX, max_total: int = POOL_MAX_IDLE_TOTAL):
+        self.max_per_host = max_per_host
+        self.max_total = max_total
+        self._idle = defaultdict(list)  # host -> sessions, oldest first
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def borrow(self, mx: str) -> SMTPConn:
+        while True:
+            with self._lock:
+                stale = self._sweep()
+                idle = self._idle.get(mx)
+                conn = idle.pop() if idle else None
+                if conn is not None:
+                    self._total -= 1
+                    if not idle:
+                        del self._idle[mx]
+            _drop(stale)
+            if conn is None:
+                return _smtp_open(mx)
+            if self._healthy(conn):
+                return conn
+            _smtp_close(conn)
+
+    def release(self, conn: SMTPConn):
+        if conn.used >= MAX_EMAILS_PER_CONN:
+            _smtp_close(conn)
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            stale = self._sweep()
+            if len(self._idle.get(conn.host, ())) >= self.max_per_host:
+                stale.append(conn)
+            elif self._total >= self.max_total and not self._idle:
+                stale.append(conn)  # nothing to evict: max_total <= 0 disables pooling
+            else:
+                if self._total >= self.max_total:
+                    stale.append(self._pop_oldest())
+                self._idle[conn.host].append(conn)
+                self._total += 1
+        _drop(stale)
+
+    def _sweep(self) -> List[SMTPConn]:
+        """Unlink sessions idle past POOL_IDLE_MAX on every host; caller holds the lock."""
+        cutoff = time.monotonic() - POOL_IDLE_MAX
+        stale = []
+        for host in list(self._idle):
+            idle = self._idle[host]
+            n = 0
+            while n < len(idle) and idle[n].last_used < cutoff:
+                n += 1
+            if n:
+                stale.extend(idle[:n])
+                del idle[:n]
+                self._total -= n
+            if not idle:
+                del self._idle[host]
+        return stale
+
+    def _pop_oldest(self) -> Optional[SMTPConn]:
+        if not self._idle:
+            return None
+        host = min(self._idle, key=lambda h: self._idle[h][0].last_used)
+        idle = self._idle[host]
+        conn = idle.pop(0)
+        self._total -= 1
+        if not idle:
+            del self._idle[host]
+        return conn
+
+    @staticmethod
+    def _healthy(conn: SMTPConn) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > POOL_IDLE_MAX:
+            return False
+        if idle_for <= POOL_CHECK_AFTER:
+            return True
+        try:
+            conn.srv.sock.settimeout(POOL_NOOP_TIMEOUT)
+            code, _ = conn.srv.noop()
+            conn.srv.sock.settimeout(conn.srv.timeout)
+            return code == 250
+        except Exception:
+            return False
+
+def _drop(conns: List[SMTPConn]):
+    # expired/evicted sessions are usually already closed by the peer; skip
+    # QUIT so a dead host can't stall the caller
+    for conn in conns:
+        try: conn.srv.close()
+        except Exception:
+            pass
+
+SMTP_POOL = SMTPPool()
+
+def _smtp_open_any(mx_hosts: List[str], reuse: bool = True) -> SMTPConn:
+    """RFC 5321 MX walk: first host, in preference order, that gives us a session."""
+    err: Optional[Exception] = None
+    for mx in mx_hosts[:MX_MAX_TRIES]:
+        try:
+            return SMTP_POOL.borrow(mx) if reuse else _smtp_open(mx)
+        except Exception as e:
+            err = e
+    raise err or OSError("no MX hosts")
 
 def rcpt_once(srv: smtplib.SMTP, address: str):
-    t0 = time.time()
+    t0 = time.perf_counter_ns()
     code, resp = srv.rcpt(address)
-    t1 = time.time()
-    latency = (t1 - t0) * 1000.0
+    latency = (time.perf_counter_ns() - t0) / 1e6
     accepted = (200 <= code < 300) or code in (451, 452)
     return accepted, round(latency, 1), code
 
 def multi_probe(srv: smtplib.SMTP, addr: str, n: int = 1):
-    lats, accs = [], []
-    for _ in range(max(1, n)):
+    reps = max(1, n)
+    total, accepted_any = 0.0, False
+    for _ in range(reps):
         a, lat, _ = rcpt_once(srv, addr)
-        lats.append(lat)
-        accs.append(a)
+        total += lat
+        accepted_any = accepted_any or a
         if n > 1:
             time.sleep(random.uniform(JITTER_MIN, JITTER_MAX))
-    accepted_any = any(accs)
-    mean_lat = round(sum(lats) / len(lats), 1)
-    return accepted_any, mean_lat
+    return accepted_any, round(total / reps, 1)
+
+def pipelined_rcpt(srv: smtplib.SMTP, addrs: List[str]):
+    """RFC 2920: send every RCPT in one write, then drain the replies in order.
+
+    Returns (accepted, code) per address. No latencies: servers may batch
+    their replies to a pipelined group, so reply timing says nothing about
+    the individual RCPTs.
+    """
+    cmds = "".join(f"RCPT TO:{smtplib.quoteaddr(a)}\r\n" for a in addrs)
+    srv.sock.sendall(cmds.encode(srv.command_encoding))
+    out = []
+    for _ in addrs:
+        code, _ = srv.getreply()
+        out.append(((200 <= code < 300) or code in (451, 452), code))
+    return out
 
 # -------- Core verification (same method) --------
-def verify_email(email: str, repeats: Optional[int] = None) -> VerifyResponse:
+# Results are plain dicts shaped like VerifyResponse's JSON output; bulk
+# responses skip the Pydantic model entirely. The verdict part of each
+# result comes from one of these fixed templates.
+_INVALID_BASE = {"result": "invalid", "catch-all": False, "deliverability": "undeliverable"}
+_VALID_BASE = {"result": "valid", "catch-all": False, "deliverability": "deliverable"}
+_CATCHALL_INVALID_BASE = {**_INVALID_BASE, "catch-all": True}
+_CATCHALL_VALID_BASE = {**_VALID_BASE, "catch-all": True}
+
+def _invalid(email: str, domain: Optional[str] = None, mx: Optional[str] = None,
+             brand: Optional[str] = None) -> dict:
+    return {"email": email, "domain": domain, "mx_host": mx, "mx_brand": brand, **_INVALID_BASE}
+
+def _valid(email: str, domain: str, mx: str, brand: str) -> dict:
+    return {"email": email, "domain": domain, "mx_host": mx, "mx_brand": brand, **_VALID_BASE}
+
+def _timing_verdict(email: str, domain: str, mx: str, brand: str,
+                    T_mean: float, i_mean: float) -> dict:
+    abs_delta = abs(T_mean - i_mean)
+    threshold = GOOGLE_THRESHOLD if brand == "google" else DEFAULT_THRESHOLD
+    base = _CATCHALL_VALID_BASE if abs_delta >= threshold else _CATCHALL_INVALID_BASE
+    return {"email": email, "domain": domain, "mx_host": mx, "mx_brand": brand, **base}
+
+def _probe_pipelined(conn: SMTPConn, email: str, domain: str, mx: str, brand: str, reps: int) -> dict:
+    # Steps 1+2 in one round trip: only accept/reject matters here, so each
+    # address goes once (repeats would just add rejections to the error count)
+    (T_acc, _), (F1_acc, _) = pipelined_rcpt(conn.srv, [ascii_addr(email), impossible_addr(domain)])
+    if not T_acc:
+        return _invalid(email, domain, mx, brand)
+    if not F1_acc:
+        # Non-catchall → target accepted ⇒ valid
+        return _valid(email, domain, mx, brand)
+
+    # Step 3: Catch-all suspected → time in a fresh envelope, so a server
+    # caching lookups per transaction can't answer the target from cache,
+    # with one RCPT in flight at a time and fakes it hasn't seen yet
+    srv = conn.srv
+    srv.rset()
+    _mail_from(srv)
+    _, T_mean = multi_probe(srv, ascii_addr(email), reps)
+    _, F1_mean = multi_probe(srv, impossible_addr(domain), reps)
+    _, F2_mean = multi_probe(srv, impossible_addr(domain), reps)
+    i_mean = (F1_mean + F2_mean) / 2.0
+    return _timing_verdict(email, domain, mx, brand, T_mean, i_mean)
+
+def _probe(conn: SMTPConn, email: str, domain: str, mx: str, brand: str, reps: int) -> dict:
+    if conn.supports_pipelining:
+        return _probe_pipelined(conn, email, domain, mx, brand, reps)
+
+    srv = conn.srv
+
+    # Step 1: Target
+    T_acc, T_mean = multi_probe(srv, ascii_addr(email), reps)
+    if not T_acc:
+        return _invalid(email, domain, mx, brand)
+
+    # Step 2: Fake1
+    F1 = impossible_addr(domain)
+    F1_acc, F1_mean = multi_probe(srv, F1, reps)
+    if not F1_acc:
+        # Non-catchall → target accepted ⇒ valid
+        return _valid(email, domain, mx, brand)
+
+    # Step 3: Catch-all suspected → Fake2 + timing
+    F2 = impossible_addr(domain)
+    F2_acc, F2_mean = multi_probe(srv, F2, reps)
+    i_mean = (F1_mean + F2_mean) / 2.0
+    return _timing_verdict(email, domain, mx, brand, T_mean, i_mean)
+
+# Caps sessions per MX host across /verify and bulk calls, so one
+# provider isn't hammered into rate-limiting us. Weak values: an MX's
+# semaphore lives only while some caller holds it.
+MX_SEMAPHORES = weakref.WeakValueDictionary()
+_MX_SEMAPHORES_LOCK = threading.Lock()
+
+def mx_semaphore(mx: str) -> threading.Semaphore:
+    with _MX_SEMAPHORES_LOCK:
+        sem = MX_SEMAPHORES.get(mx)
+        if sem is None:
+            sem = MX_SEMAPHORES[mx] = threading.Semaphore(MX_CONCURRENCY)
+        return sem
+
+def verify_batch_same_mx(mx_hosts: List[str], emails: List[str],
+                         reps: Optional[int] = None) -> List[dict]:
+    """Verify emails that share MX hosts over one SMTP session, RSET between targets.
+
+    The MX slot is taken per chunk of MX_SLOT_TARGETS targets, so other
+    callers for the same MX (a /verify, another bulk job) get a turn in
+    between; the session goes back to the pool, where they can pick it up.
+    """
+    reps = DEFAULT_REPEATS if reps is None else max(1, int(reps))
+    sem = mx_semaphore(mx_hosts[0])
+    out: List[dict] = []
+    for start in range(0, len(emails), MX_SLOT_TARGETS):
+        chunk = emails[start:start + MX_SLOT_TARGETS]
+        # bounded wait: past MX_SLOT_WAIT, probe anyway rather than stall or fail
+        got = sem.acquire(timeout=MX_SLOT_WAIT)
+        try:
+            results, reachable = _verify_batch(mx_hosts, chunk, reps)
+        finally:
+            if got:
+                sem.release()
+        out.extend(results)
+        if not reachable:
+            # no host answered: don't dial them again for every chunk
+            mx = mx_hosts[0]
+            brand = mx_brand_from_host(mx)
+            out.extend(_invalid(e, get_domain(e), mx, brand) for e in emails[start + len(chunk):])
+            break
+    return out
+
+def _verify_batch(mx_hosts: List[str], emails: List[str], reps: int) -> Tuple[List[dict], bool]:
+    out: List[dict] = []
+    conn = None
+    # reported host/brand follow whichever MX actually answered
+    mx = mx_hosts[0]
+    brand = mx_brand_from_host(mx)
+    for i, email in enumerate(emails):
+        domain = get_domain(email)
+        for attempt in (0, 1):
+            try:
+                if conn is not None and conn.used >= MAX_EMAILS_PER_CONN:
+                    SMTP_POOL.release(conn)  # retires it
+                    conn = None
+                if conn is None:
+                    try:
+                        # after a drop, don't trust another pooled session for the retry
+                        conn = _smtp_open_any(mx_hosts, reuse=not attempt)
+                    except Exception:
+                        # no host reachable: no point dialling them again for the rest
+                        out.extend(_invalid(e, get_domain(e), mx, brand) for e in emails[i:])
+                        return out, False
+                    mx = conn.host
+                    brand = mx_brand_from_host(mx)
+                if conn.used:
+                    conn.srv.rset()
+                    _mail_from(conn.srv)
+                conn.used += 1
+                out.append(_probe(conn, email, domain, mx, brand, reps))
+                break
+            except smtplib.SMTPServerDisconnected:
+                # server dropped the session; reopen once and retry this email
+                conn.srv.close()
+                conn = None
+                if attempt:
+                    out.append(_invalid(email, domain, mx, brand))
+            except Exception:
+                if conn is not None:
+                    _smtp_close(conn)
+                    conn = None
+                out.append(_invalid(email, domain, mx, brand))
+                break
+    if conn is not None:
+        # the batch is already probed; a pool hiccup must not cost its results
+        try:
+            SMTP_POOL.release(conn)
+        except Exception:
+            _smtp_close(conn)
+    return out, True
+
+def verify_email(email: str, repeats: Optional[int] = None) -> dict:
     try:
         domain = get_domain(email)
     except Exception:
-        return VerifyResponse(
-            email=email, domain=None, mx_host=None, mx_brand=None,
-            result="invalid", catch_all=False, deliverability="undeliverable"
-        )
+        return _invalid(email)
+    if not cheap_syntax_ok(email) or is_disposable(domain):
+        return _invalid(email, domain)
 
-    mx_list = resolve_mx(domain)
+    mx_list = cached_resolve_mx(domain)
     if not mx_list:
-        return VerifyResponse(
-            email=email, domain=domain, mx_host=None, mx_brand=None,
-            result="invalid", catch_all=False, deliverability="undeliverable"
-        )
+        return _invalid(email, domain)
 
-    mx = mx_list[0]
-    brand = mx_brand_from_host(mx)
-    reps = DEFAULT_REPEATS if repeats is None else max(1, int(repeats))
+    return verify_batch_same_mx(mx_list, [email], repeats)[0]
 
-    try:
-        srv = _smtp_open(mx)
-    except Exception:
-        return VerifyResponse(
-            email=email, domain=domain, mx_host=mx, mx_brand=brand,
-            result="invalid", catch_all=False, deliverability="undeliverable"
-        )
+# -------- Async bulk pipeline --------
+async def verify_many(emails: List[str], repeats: Optional[int] = None) -> List[dict]:
+    # lead lists repeat addresses a lot: verify each normalized address once,
+    # then fan results back out in input order, echoing the caller's spelling.
+    # The lowercase key is only for dedup; local parts are case-sensitive
+    # (RFC 5321), so RCPT goes to the first spelling seen, as /verify would.
+    norm = [e.strip().lower() for e in emails]
+    first = {}
+    for e, n in zip(emails, norm):
+        first.setdefault(n, e.strip())
+    lut = dict(zip(first, await _verify_unique(list(first.values()), repeats)))
+    return [{**lut[n], "email": e} for e, n in zip(emails, norm)]
 
-    try:
-        # Step 1: Target
-        T_acc, T_mean = multi_probe(srv, email, reps)
-        if not T_acc:
-            return VerifyResponse(
-                email=email, domain=domain, mx_host=mx, mx_brand=brand,
-                result="invalid", catch_all=False, deliverability="undeliverable"
-            )
+async def _verify_unique(emails: List[str], repeats: Optional[int] = None) -> List[dict]:
+    out: List[Optional[dict]] = [None] * len(emails)
+    by_domain = defaultdict(list)
+    for i, e in enumerate(emails):
+        try:
+            domain = get_domain(e)
+        except Exception:
+            out[i] = _invalid(e)
+            continue
+        if not cheap_syntax_ok(e) or is_disposable(domain):
+            out[i] = _invalid(e, domain)
+        else:
+            by_domain[domain].append(i)
 
-        # Step 2: Fake1
-        F1 = impossible_addr(domain)
-        F1_acc, F1_mean = multi_probe(srv, F1, reps)
-        if not F1_acc:
-            # Non-catchall → target accepted ⇒ valid
-            return VerifyResponse(
-                email=email, domain=domain, mx_host=mx, mx_brand=brand,
-                result="valid", catch_all=False, deliverability="deliverable"
+    # bucket by MX host list so each MX gets a single reused session
+    buckets = defaultdict(list)
+    for domain, mx_list in (await prewarm_mx(by_domain)).items():
+        for i in by_domain[domain]:
+            if mx_list:
+                buckets[tuple(mx_list[:MX_MAX_TRIES])].append(i)
+            else:
+                out[i] = _invalid(emails[i], domain)
+
+    async def run_bucket(mx_hosts: tuple, idx: List[int]):
+        batch = [emails[i] for i in idx]
+        try:
+            # smtplib is blocking, so the session itself runs on the SMTP thread pool
+            results = await asyncio.get_running_loop().run_in_executor(
+                BULK_EXECUTOR, verify_batch_same_mx, list(mx_hosts), batch, repeats
             )
+        except Exception:
+            mx = mx_hosts[0]
+            results = [_invalid(e, get_domain(e), mx, mx_brand_from_host(mx)) for e in batch]
+        for i, r in zip(idx, results):
+            out[i] = r
+
+    await asyncio.gather(*(run_bucket(hosts, idx) for hosts, idx in buckets.items()))
+    return out
 
-        # Step 3: Catch-all suspected → Fake2 + timing
-        F2 = impossible_addr(domain)
-        F2_acc, F2_mean = multi_probe(srv, F2, reps)
-        i_mean = (F1_mean + F2_mean) / 2.0
-        abs_delta = abs(T_mean - i_mean)
-        threshold = GOOGLE_THRESHOLD if brand == "google" else DEFAULT_THRESHOLD
-        is_valid = abs_delta >= threshold
-
-        return VerifyResponse(
-            email=email, domain=domain, mx_host=mx, mx_brand=brand,
-            result="valid" if is_valid else "invalid",
-            catch_all=True,
-            deliverability="deliverable" if is_valid else "undeliverable"
-        )
+def read_csv_emails(raw) -> List[str]:
+    """Stream the first CSV column off the spooled upload, stopping past MAX_BULK."""
+    stream = io.TextIOWrapper(raw, encoding="utf-8", errors="ignore", newline="")
+    try:
+        emails: List[str] = []
+        for row in csv.reader(stream):
+            if not row: continue
+            val = row[0].strip()
+            if val.lower() == "email":  # skip header
+                continue
+            # cells aren't EmailStr-validated; accept "Name <addr>" forms
+            emails.append(parseaddr(val)[1] or val)
+            if len(emails) > MAX_BULK:
+                break
+        return emails
     finally:
-        try: srv.quit()
-        except Exception:
-            try: srv.close()
-            except Exception:
-                pass
+        stream.detach()  # leave the upload's file open for Starlette to close
 
 # -------- Routes --------
 @app.get("/")
@@ -173,43 +658,28 @@ def root():
 
 @app.post("/verify", response_model=VerifyResponse)
 def verify_single(email: EmailStr = Body(..., embed=True), repeats: Optional[int] = None):
-    # FastAPI will serialize using the alias "catch-all" automatically
+    # validated against VerifyResponse, serialized with the "catch-all" alias
     return verify_email(str(email), repeats=repeats)
 
-@app.post("/bulk", response_model=List[VerifyResponse])
-def verify_bulk(req: BulkRequest):
+@app.post("/bulk", response_class=ORJSONResponse, response_model=None,
+          responses={200: {"model": List[VerifyResponse]}})
+async def verify_bulk(req: BulkRequest):
     emails = req.emails or []
     if not emails:
         raise HTTPException(status_code=400, detail="emails list is empty")
     if len(emails) > MAX_BULK:
         raise HTTPException(status_code=413, detail=f"emails exceed MAX_BULK={MAX_BULK}")
-    reps = req.repeats
-    out: List[VerifyResponse] = []
-    for e in emails:
-        try:
-            out.append(verify_email(str(e), repeats=reps))
-        except Exception:
-            out.append(VerifyResponse(
-                email=str(e), domain=None, mx_host=None, mx_brand=None,
-                result="invalid", catch_all=False, deliverability="undeliverable"
-            ))
-    return out
+    # returning the Response itself skips FastAPI's jsonable_encoder pass;
+    # orjson serializes the whole list in one call
+    return ORJSONResponse(await verify_many([str(e) for e in emails], repeats=req.repeats))
 
-@app.post("/bulk/csv", response_model=List[VerifyResponse])
+@app.post("/bulk/csv", response_class=ORJSONResponse, response_model=None,
+          responses={200: {"model": List[VerifyResponse]}})
 async def verify_bulk_csv(file: UploadFile = File(...), repeats: Optional[int] = None):
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="upload a .csv file")
-    content = await file.read()
     try:
-        stream = io.StringIO(content.decode("utf-8", errors="ignore"))
-        reader = csv.reader(stream)
-        emails: List[str] = []
-        for row in reader:
-            if not row: continue
-            val = row[0].strip()
-            if val.lower() == "email":  # skip header
-                continue
-            emails.append(val)
+        emails = await asyncio.to_thread(read_csv_emails, file.file)
     except Exception:
         raise HTTPException(status_code=400, detail="failed to parse CSV")
 
@@ -218,13 +688,4 @@ async def verify_bulk_csv(file: UploadFile = File(...), repeats: Optional[int] =
     if len(emails) > MAX_BULK:
         raise HTTPException(status_code=413, detail=f"emails exceed MAX_BULK={MAX_BULK}")
 
-    out: List[VerifyResponse] = []
-    for e in emails:
-        try:
-            out.append(verify_email(e, repeats=repeats))
-        except Exception:
-            out.append(VerifyResponse(
-                email=e, domain=None, mx_host=None, mx_brand=None,
-                result="invalid", catch_all=False, deliverability="undeliverable"
-            ))
-    return out
+    return ORJSONResponse(await verify_many(emails, repeats=repeats))